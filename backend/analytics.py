@@ -0,0 +1,341 @@
+"""
+Per-video analytics over a bulk comment dump.
+
+Reads a comment dump (JSON Lines or CSV) with one comment per row, scores
+every comment with the local models in batches across a process pool and
+keeps running per-video aggregates:
+
+    - emotion / sentiment / like count label histograms
+    - mean raw like count regression value
+    - top-N comments with the highest predicted like count
+
+Only the aggregates are kept in memory, so the dump itself can be larger
+than RAM. The result is written as a columnar JSON summary (one list per
+column, one row per video).
+
+Models are loaded once in the parent process. On Linux the workers are
+forked and share those weights copy-on-write, so --workers defaults to the
+number of cores. Other platforms (macOS, Windows) use the default spawn
+start method, where every worker loads its own copy, so --workers defaults
+to at most 4 there.
+
+Usage:
+    python analytics.py comments.jsonl -o summary.json --workers 4
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_TOP_N = 5
+# Fork hanya di Linux; di macOS fork setelah torch ter-inisialisasi bisa crash/hang
+USE_FORK = sys.platform.startswith("linux")
+# Tanpa fork setiap worker memegang salinan model sendiri, jadi default dibatasi
+DEFAULT_WORKERS = (os.cpu_count() or 1) if USE_FORK else min(4, os.cpu_count() or 1)
+PREVIEW_LENGTH = 100
+
+# Model module, di-load sekali di parent (dan di worker jika tidak memakai fork)
+predictor = None
+
+
+def load_predictor():
+    """Load the models into this process"""
+    global predictor
+    import torch
+    # Satu thread per process, supaya skala linear dengan jumlah core
+    torch.set_num_threads(1)
+    import app as predictor_module
+    predictor = predictor_module
+
+
+def init_worker():
+    """Prepare a worker process, loading the models unless inherited via fork"""
+    if predictor is None:
+        load_predictor()
+    else:
+        import torch
+        torch.set_num_threads(1)
+
+
+def models_loaded():
+    """Check whether at least one prediction model is usable"""
+    return bool(
+        (predictor.emotion_model and predictor.emotion_tokenizer)
+        or (predictor.sentiment_model and predictor.sentiment_tokenizer)
+        or (predictor.like_model and predictor.embedding_tokenizer and predictor.embedding_model)
+    )
+
+
+def classify_batch(texts, tokenizer, model):
+    """Predict class indices for a batch of texts"""
+    import torch
+    inputs = predictor.encode_texts(texts, tokenizer)
+    with torch.no_grad():
+        logits = model(**inputs).logits
+    return torch.argmax(logits, dim=1).tolist()
+
+
+def like_count_batch(texts):
+    """Predict raw like count outputs for a batch of texts"""
+    import torch
+    inputs = predictor.encode_texts(texts, predictor.embedding_tokenizer, max_length=512)
+    with torch.no_grad():
+        outputs = predictor.embedding_model(**inputs)
+    features = outputs.last_hidden_state[:, 0, :].numpy()
+    return list(predictor.like_model.predict(features))
+
+
+def score_batch(batch):
+    """Score a batch of (video_id, text) rows in a worker process"""
+    texts = [text for _, text in batch]
+    n = len(texts)
+
+    if predictor.emotion_model and predictor.emotion_tokenizer:
+        emotions = [
+            predictor.emotion_labels.get(i, "unknown")
+            for i in classify_batch(texts, predictor.emotion_tokenizer, predictor.emotion_model)
+        ]
+    else:
+        emotions = ["model_not_loaded"] * n
+
+    if predictor.sentiment_model and predictor.sentiment_tokenizer:
+        sentiments = [
+            predictor.sentiment_labels.get(i, "unknown")
+            for i in classify_batch(texts, predictor.sentiment_tokenizer, predictor.sentiment_model)
+        ]
+    else:
+        sentiments = ["model_not_loaded"] * n
+
+    like_counts = []
+    raw_values = []
+    scores = []
+    if predictor.like_model and predictor.embedding_tokenizer and predictor.embedding_model:
+        for value in like_count_batch(texts):
+            like_class = predictor.like_count_class(value, verbose=False)
+            like_counts.append(predictor.like_count_labels.get(like_class, "unknown"))
+            if predictor.is_class_index(value):
+                # Model klasifikasi, tidak ada nilai regresi; ranking memakai index kelas
+                raw_values.append(None)
+                scores.append(float(value))
+            else:
+                raw_values.append(float(value))
+                scores.append(float(value))
+    else:
+        like_counts = ["model_not_loaded"] * n
+        raw_values = [None] * n
+        scores = [None] * n
+
+    return [
+        (video_id, text, emotion, sentiment, like_count, raw, score)
+        for (video_id, text), emotion, sentiment, like_count, raw, score
+        in zip(batch, emotions, sentiments, like_counts, raw_values, scores)
+    ]
+
+
+class VideoAggregate:
+    """Running aggregates for a single video"""
+
+    def __init__(self, top_n):
+        self.top_n = top_n
+        self.count = 0
+        self.emotion_counts = {}
+        self.sentiment_counts = {}
+        self.like_count_counts = {}
+        self.raw_sum = 0.0
+        self.raw_count = 0
+        # Min-heap berisi (score, seq, raw_value, preview), ukuran maksimal top_n
+        self.top = []
+        self._seq = 0
+
+    def add(self, text, emotion, sentiment, like_count, raw, score):
+        self.count += 1
+        self.emotion_counts[emotion] = self.emotion_counts.get(emotion, 0) + 1
+        self.sentiment_counts[sentiment] = self.sentiment_counts.get(sentiment, 0) + 1
+        self.like_count_counts[like_count] = self.like_count_counts.get(like_count, 0) + 1
+
+        if raw is not None:
+            self.raw_sum += raw
+            self.raw_count += 1
+        if score is None or self.top_n <= 0:
+            return
+
+        self._seq += 1
+        entry = (score, self._seq, raw, text[:PREVIEW_LENGTH])
+        if len(self.top) < self.top_n:
+            heapq.heappush(self.top, entry)
+        elif score > self.top[0][0]:
+            heapq.heapreplace(self.top, entry)
+
+    def mean_raw(self):
+        return self.raw_sum / self.raw_count if self.raw_count else None
+
+    def top_comments(self):
+        return [
+            {"comment": preview, "raw_like_count": raw}
+            for _, _, raw, preview in sorted(self.top, reverse=True)
+        ]
+
+
+def parse_json_lines(f, stats):
+    """Parse JSON Lines, counting malformed lines instead of failing"""
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            stats["bad_rows"] += 1
+
+
+def read_comments(path, video_key, text_key, stats):
+    """Stream (video_id, text) rows from a JSON Lines or CSV dump"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = parse_json_lines(f, stats)
+
+        for row in rows:
+            if not isinstance(row, dict) or not isinstance(row.get(text_key) or "", str):
+                stats["bad_rows"] += 1
+                continue
+            video_id = row.get(video_key)
+            video_id = "" if video_id is None else str(video_id).strip()
+            text = (row.get(text_key) or "").strip()
+            if not video_id or not text:
+                stats["skipped_rows"] += 1
+                continue
+            yield video_id, text
+
+
+def iter_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_summary(aggregates, stats):
+    """Turn per-video aggregates into a columnar summary"""
+    video_ids = sorted(aggregates)
+    emotion_names = sorted({k for a in aggregates.values() for k in a.emotion_counts})
+    sentiment_names = sorted({k for a in aggregates.values() for k in a.sentiment_counts})
+    like_count_names = sorted({k for a in aggregates.values() for k in a.like_count_counts})
+
+    columns = {
+        "video_id": video_ids,
+        "comments": [aggregates[v].count for v in video_ids],
+        "anger_share": [
+            aggregates[v].emotion_counts.get("anger", 0) / aggregates[v].count
+            for v in video_ids
+        ],
+        "mean_raw_like_count": [aggregates[v].mean_raw() for v in video_ids],
+    }
+    for name in emotion_names:
+        columns[f"emotion_{name}"] = [aggregates[v].emotion_counts.get(name, 0) for v in video_ids]
+    for name in sentiment_names:
+        columns[f"sentiment_{name}"] = [aggregates[v].sentiment_counts.get(name, 0) for v in video_ids]
+    for name in like_count_names:
+        columns[f"like_count_{name}"] = [aggregates[v].like_count_counts.get(name, 0) for v in video_ids]
+    columns["top_viral"] = [aggregates[v].top_comments() for v in video_ids]
+
+    return {
+        "rows": len(video_ids),
+        "bad_rows": stats["bad_rows"],
+        "skipped_rows": stats["skipped_rows"],
+        "columns": columns
+    }
+
+
+def run_analytics(path, workers, batch_size, top_n, video_key="video_id", text_key="text"):
+    """Score a comment dump and return the per-video columnar summary"""
+    if predictor is None:
+        load_predictor()
+    if not models_loaded():
+        raise RuntimeError(f"No prediction model could be loaded from {predictor.MODELS_DIR}")
+
+    aggregates = {}
+    stats = {"bad_rows": 0, "skipped_rows": 0}
+    # Batasi jumlah batch yang sedang diproses, supaya memori tetap terbatas
+    max_in_flight = workers * 2
+    scored = 0
+    start = time.time()
+
+    def collect(futures):
+        nonlocal scored
+        for future in futures:
+            for video_id, text, emotion, sentiment, like_count, raw, score in future.result():
+                aggregate = aggregates.get(video_id)
+                if aggregate is None:
+                    aggregate = aggregates[video_id] = VideoAggregate(top_n)
+                aggregate.add(text, emotion, sentiment, like_count, raw, score)
+                scored += 1
+
+    # Dengan fork, worker berbagi bobot model dari parent (copy-on-write)
+    context = multiprocessing.get_context("fork") if USE_FORK else None
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+        pending = set()
+        rows = read_comments(path, video_key, text_key, stats)
+        for batch in iter_batches(rows, batch_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                print(f"📊 Scored {scored} comments ({len(aggregates)} videos)")
+            pending.add(pool.submit(score_batch, batch))
+        collect(pending)
+
+    elapsed = time.time() - start
+    print(f"✅ Scored {scored} comments for {len(aggregates)} videos in {elapsed:.1f}s")
+    if stats["bad_rows"] or stats["skipped_rows"]:
+        print(f"⚠️ Skipped {stats['bad_rows']} malformed and {stats['skipped_rows']} incomplete rows")
+    return build_summary(aggregates, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-video analytics over a comment dump")
+    parser.add_argument("input", help="Comment dump (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", default="video_summary.json", help="Output summary file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--video-key", default="video_id", help="Field holding the video id")
+    parser.add_argument("--text-key", default="text", help="Field holding the comment text")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(1)
+
+    print(f"🚀 Running analytics on {args.input} with {args.workers} workers")
+    try:
+        summary = run_analytics(
+            args.input,
+            max(1, args.workers),
+            max(1, args.batch_size),
+            args.top_n,
+            args.video_key,
+            args.text_key
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False)
+    print(f"📄 Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModel, AutoModelForSequenceClassification
 import torch
 import os
+import sys
 import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 import joblib
 import numpy as np
 from datetime import datetime
@@ -11,76 +16,450 @@ from datetime import datetime
 app = Flask(__name__)
 CORS(app)
 
-# Path ke model lokal
-EMOTION_MODEL_PATH = "./models/model_emotion"
-SENTIMENT_MODEL_PATH = "./models/model_sentiment"
-LIKE_COUNT_MODEL_PATH = "./models/model_predict"
+# Path ke model lokal, relatif terhadap folder backend
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+EMOTION_MODEL_PATH = os.path.join(MODELS_DIR, "model_emotion")
+SENTIMENT_MODEL_PATH = os.path.join(MODELS_DIR, "model_sentiment")
+LIKE_COUNT_MODEL_PATH = os.path.join(MODELS_DIR, "model_predict")
 XGBOOST_MODEL_PATH = os.path.join(LIKE_COUNT_MODEL_PATH, "xgboost_BERT_embeddings.pkl")
 HISTORY_FILE = "./history.json"
 
+LOW_MEMORY_MODE = os.environ.get("LOW_MEMORY", "0") == "1"
+# Jumlah maksimal teks yang hasil tokenisasinya disimpan, 0 = cache dimatikan
+TOKENIZATION_CACHE_SIZE = int(os.environ.get("TOKENIZATION_CACHE_SIZE", "1024"))
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Tokenizer yang sudah di-load, key = fingerprint konfigurasi tokenizer
+loaded_tokenizers = {}
+# Memory usage dari batch /predict terakhir
+last_batch_memory = None
+
+# Cache hasil tokenisasi, key = (tokenizer, max_length, text)
+tokenization_cache = OrderedDict()
+tokenization_lock = threading.Lock()
+# Waktu tokenisasi per request, hanya aktif di dalam /predict
+tokenization_local = threading.local()
+tokenization_stats = {
+    "requests": 0,
+    "request_seconds": 0.0,
+    "tokenize_seconds": 0.0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "last_request_seconds": None,
+    "last_tokenize_seconds": None
+}
+
+class SlowTokenizerError(RuntimeError):
+    """Raised when only a slow (pure Python) tokenizer is available"""
+
+def tokenizer_fingerprint(tokenizer):
+    """Hash the full configuration of a loaded fast tokenizer"""
+    digest = hashlib.sha256()
+    # Serialisasi Rust tokenizer berisi vocab, added tokens, normalizer,
+    # pre-tokenizer dan post-processor
+    digest.update(tokenizer.backend_tokenizer.to_str().encode("utf-8"))
+    digest.update(json.dumps({
+        "class": type(tokenizer).__name__,
+        "special_tokens": tokenizer.special_tokens_map,
+        "model_max_length": tokenizer.model_max_length,
+        "padding_side": tokenizer.padding_side,
+        "truncation_side": tokenizer.truncation_side
+    }, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def load_tokenizer(model_path):
+    """Load a fast tokenizer, reusing an identical one if already loaded"""
+    # use_fast mengkonversi tokenizer lambat ke Rust tokenizer jika memungkinkan
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    if not tokenizer.is_fast:
+        raise SlowTokenizerError(
+            f"Only a slow tokenizer is available for {model_path}, "
+            "add tokenizer.json or install the tokenizers/sentencepiece packages"
+        )
+
+    fingerprint = tokenizer_fingerprint(tokenizer)
+    if fingerprint in loaded_tokenizers:
+        print(f"♻️ Reusing identical tokenizer for {model_path}")
+        return loaded_tokenizers[fingerprint]
+    loaded_tokenizers[fingerprint] = tokenizer
+    return tokenizer
+
+def build_padded_inputs(rows, tokenizer):
+    """Pad cached per-row tensors into a batch, mirroring tokenizer padding"""
+    max_len = max(len(row["input_ids"]) for row in rows)
+    pad_values = {
+        "input_ids": tokenizer.pad_token_id or 0,
+        "attention_mask": 0,
+        "token_type_ids": tokenizer.pad_token_type_id
+    }
+    inputs = {}
+    for name in rows[0]:
+        batch = torch.full((len(rows), max_len), pad_values.get(name, 0), dtype=rows[0][name].dtype)
+        for i, row in enumerate(rows):
+            length = len(row[name])
+            if tokenizer.padding_side == "left":
+                batch[i, max_len - length:] = row[name]
+            else:
+                batch[i, :length] = row[name]
+        inputs[name] = batch
+    return inputs
+
+def encode_texts(texts, tokenizer, max_length=None):
+    """Batch-encode texts into padded tensors, reusing cached ids for repeated texts"""
+    start = time.perf_counter()
+    # model_max_length bisa berupa nilai sentinel yang sangat besar jika tidak di-set
+    model_max_length = tokenizer.model_max_length if tokenizer.model_max_length < 1_000_000 else None
+    limits = [value for value in (max_length, model_max_length) if value]
+    limit = min(limits) if limits else None
+    keys = [(id(tokenizer), limit, text) for text in texts]
+    rows = [None] * len(texts)
+
+    if TOKENIZATION_CACHE_SIZE > 0:
+        with tokenization_lock:
+            for i, key in enumerate(keys):
+                if key in tokenization_cache:
+                    tokenization_cache.move_to_end(key)
+                    rows[i] = tokenization_cache[key]
+
+    missing = [i for i, row in enumerate(rows) if row is None]
+    inputs = None
+    if missing:
+        # Satu panggilan batch ke Rust tokenizer untuk semua teks yang belum di-cache
+        encoded = tokenizer(
+            [texts[i] for i in missing],
+            truncation=True,
+            padding=True,
+            max_length=limit,
+            return_tensors="pt"
+        )
+        if len(missing) == len(texts):
+            inputs = dict(encoded)
+
+        if TOKENIZATION_CACHE_SIZE > 0 or inputs is None:
+            lengths = encoded["attention_mask"].sum(dim=1).tolist()
+            for j, i in enumerate(missing):
+                if tokenizer.padding_side == "left":
+                    offset = encoded["input_ids"].shape[1] - lengths[j]
+                    rows[i] = {name: values[j, offset:].clone() for name, values in encoded.items()}
+                else:
+                    rows[i] = {name: values[j, :lengths[j]].clone() for name, values in encoded.items()}
+
+        if TOKENIZATION_CACHE_SIZE > 0:
+            with tokenization_lock:
+                for i in missing:
+                    tokenization_cache[keys[i]] = rows[i]
+                while len(tokenization_cache) > TOKENIZATION_CACHE_SIZE:
+                    tokenization_cache.popitem(last=False)
+
+    if inputs is None:
+        inputs = build_padded_inputs(rows, tokenizer)
+
+    elapsed = time.perf_counter() - start
+    if getattr(tokenization_local, "seconds", None) is not None:
+        tokenization_local.seconds += elapsed
+    with tokenization_lock:
+        tokenization_stats["cache_hits"] += len(texts) - len(missing)
+        tokenization_stats["cache_misses"] += len(missing)
+    return inputs
+
+def match_checkpoint_prefix(model, state_dict):
+    """Add or strip the base model prefix so checkpoint keys match the model"""
+    model_keys = set(model.state_dict().keys())
+    prefix = model.base_model_prefix + "."
+    candidates = [
+        state_dict,
+        {k[len(prefix):]: v for k, v in state_dict.items() if k.startswith(prefix)},
+        {prefix + k: v for k, v in state_dict.items()}
+    ]
+    return max(candidates, key=lambda candidate: len(model_keys & candidate.keys()))
+
+def load_mmap_model(model_class, model_path, safetensors_path):
+    """Load a model whose parameters stay backed by the mmap of model.safetensors"""
+    from accelerate import init_empty_weights
+    from safetensors.torch import load_file
+
+    # Parameter dibuat di device meta, buffer (mis. position_ids) tetap di CPU
+    config = AutoConfig.from_pretrained(model_path)
+    with init_empty_weights(include_buffers=False):
+        model = model_class.from_config(config)
+
+    # load_file memetakan file dengan mmap, tensor menunjuk ke page cache
+    state_dict = match_checkpoint_prefix(model, load_file(safetensors_path))
+    dtypes = {tensor.dtype for tensor in state_dict.values()}
+    if dtypes - {torch.float32}:
+        raise ValueError(f"checkpoint dtype {dtypes} would need a converted copy")
+
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"checkpoint is missing weights: {missing[:5]}")
+    return model
+
+def load_model(model_class, model_path):
+    """Load a model for inference, memory-mapping safetensors in low-memory mode"""
+    model = None
+    safetensors_path = os.path.join(model_path, "model.safetensors")
+    if LOW_MEMORY_MODE and os.path.exists(safetensors_path):
+        try:
+            model = load_mmap_model(model_class, model_path, safetensors_path)
+            print(f"🗺️ Memory-mapped weights from {safetensors_path}")
+        except Exception as e:
+            print(f"⚠️ Memory-mapped loading failed ({e}), using from_pretrained")
+    elif LOW_MEMORY_MODE:
+        print(f"⚠️ No model.safetensors in {model_path}, weights are copied into memory")
+
+    if model is None:
+        kwargs = {}
+        if LOW_MEMORY_MODE:
+            # Tanpa inisialisasi acak dan salinan bobot kedua saat loading
+            kwargs["low_cpu_mem_usage"] = True
+        model = model_class.from_pretrained(model_path, **kwargs)
+    model.eval()
+    model.requires_grad_(False)
+    return model
+
+def drop_unused_modules(model):
+    """Drop the pooler head, embeddings only use the CLS hidden state"""
+    if getattr(model, "pooler", None) is not None:
+        model.pooler = None
+        print("✂️ Dropped unused pooler head from embedding model")
+
+def share_identical_weights(models):
+    """Point identical parameters of several models at a single tensor"""
+    registry = {}
+    shared_bytes = 0
+    for model in models:
+        if model is None:
+            continue
+        for module in model.modules():
+            for name, param in list(module._parameters.items()):
+                if param is None or param.numel() == 0:
+                    continue
+                flat = param.detach().reshape(-1)
+                key = (tuple(param.shape), param.dtype, float(flat.sum()), float(flat[0]))
+                candidates = registry.setdefault(key, [])
+                canonical = next(
+                    (c for c in candidates if c is param or torch.equal(c, param)),
+                    None
+                )
+                if canonical is None:
+                    candidates.append(param)
+                elif canonical is not param:
+                    module._parameters[name] = canonical
+                    shared_bytes += param.numel() * param.element_size()
+    if shared_bytes:
+        print(f"♻️ Shared {shared_bytes / 1024 ** 2:.1f} MB of identical weights")
+    return shared_bytes
+
+def tensor_bytes(tensors):
+    """Bytes used by tensors, counting shared storage once"""
+    seen = set()
+    total = 0
+    for tensor in tensors:
+        ptr = tensor.data_ptr()
+        if ptr in seen:
+            continue
+        seen.add(ptr)
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+def model_memory(model):
+    """Parameter and buffer bytes of a model"""
+    if model is None:
+        return None
+    return {
+        "parameter_bytes": tensor_bytes(model.parameters()),
+        "buffer_bytes": tensor_bytes(model.buffers())
+    }
+
+def get_rss_bytes():
+    """Current resident set size of this process"""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+def get_process_peak_rss_bytes():
+    """Peak resident set size over the whole life of this process"""
+    if psutil:
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak is not None:
+            return peak
+    if resource:
+        # ru_maxrss dalam KB di Linux, dalam bytes di macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+def reset_peak_rss():
+    """Reset the Linux RSS high-water mark, returns False if not supported"""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return read_hwm_bytes() is not None
+    except OSError:
+        return False
+
+def read_hwm_bytes():
+    """RSS high-water mark (VmHWM) since the last reset"""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+class PeakMemoryTracker:
+    """Track peak RSS during a single call.
+
+    Uses the resettable VmHWM counter on Linux and falls back to sampling
+    RSS from a background thread elsewhere. Both measure the whole process,
+    so concurrent requests can raise each other's peak.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.rss_before = None
+        self.peak = None
+        self.use_hwm = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            rss = get_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.rss_before = get_rss_bytes()
+        self.use_hwm = reset_peak_rss()
+        if not self.use_hwm:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.use_hwm:
+            self.peak = read_hwm_bytes()
+        elif self._thread:
+            self._stop.set()
+            self._thread.join()
+        rss_after = get_rss_bytes()
+        if rss_after is not None and self.peak is not None:
+            self.peak = max(self.peak, rss_after)
+        return {
+            "rss_before_bytes": self.rss_before,
+            "rss_after_bytes": rss_after,
+            "batch_peak_rss_bytes": self.peak,
+            "peak_method": "vmhwm" if self.use_hwm else "sampling"
+        }
+
 print("🔄 Loading local models...")
+if LOW_MEMORY_MODE:
+    print("🪶 Low-memory mode enabled")
 
 # Global variables untuk model
 emotion_model, emotion_tokenizer = None, None
 sentiment_model, sentiment_tokenizer = None, None
 embedding_tokenizer, embedding_model = None, None
-like_model = joblib.load(XGBOOST_MODEL_PATH)
+like_model = None
+shared_weight_bytes = 0
 
-# Detailed model loading with debugging
-try:
-    # Load Emotion model
-    if os.path.exists(EMOTION_MODEL_PATH):
-        emotion_model = AutoModelForSequenceClassification.from_pretrained(EMOTION_MODEL_PATH)
-        emotion_tokenizer = AutoTokenizer.from_pretrained(EMOTION_MODEL_PATH)
+def exit_on_slow_tokenizer(e):
+    """Stop the server, a slow tokenizer is a setup error rather than a missing model"""
+    print(f"❌ {e}")
+    sys.exit(1)
+
+# Detailed model loading with debugging, setiap model punya guard sendiri
+# Load Emotion model
+if os.path.exists(EMOTION_MODEL_PATH):
+    try:
+        emotion_tokenizer = load_tokenizer(EMOTION_MODEL_PATH)
+        emotion_model = load_model(AutoModelForSequenceClassification, EMOTION_MODEL_PATH)
         print("✅ Local emotion model loaded successfully")
-    else:
-        print(f"❌ Emotion model not found at {EMOTION_MODEL_PATH}")
+    except SlowTokenizerError as e:
+        exit_on_slow_tokenizer(e)
+    except Exception as e:
+        print(f"❌ Error loading emotion model: {e}")
+        emotion_model, emotion_tokenizer = None, None
+else:
+    print(f"❌ Emotion model not found at {EMOTION_MODEL_PATH}")
 
-    # Load Sentiment model
-    if os.path.exists(SENTIMENT_MODEL_PATH):
-        sentiment_model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_PATH)
-        sentiment_tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_PATH)
+# Load Sentiment model
+if os.path.exists(SENTIMENT_MODEL_PATH):
+    try:
+        sentiment_tokenizer = load_tokenizer(SENTIMENT_MODEL_PATH)
+        sentiment_model = load_model(AutoModelForSequenceClassification, SENTIMENT_MODEL_PATH)
         print("✅ Local sentiment model loaded successfully")
-    else:
-        print(f"❌ Sentiment model not found at {SENTIMENT_MODEL_PATH}")
-
-    # Load Like Count models with detailed debugging
-    print(f"\n🔍 Checking like count model path: {LIKE_COUNT_MODEL_PATH}")
-    print(f"📁 Directory exists: {os.path.exists(LIKE_COUNT_MODEL_PATH)}")
+    except SlowTokenizerError as e:
+        exit_on_slow_tokenizer(e)
+    except Exception as e:
+        print(f"❌ Error loading sentiment model: {e}")
+        sentiment_model, sentiment_tokenizer = None, None
+else:
+    print(f"❌ Sentiment model not found at {SENTIMENT_MODEL_PATH}")
+
+# Load Like Count models with detailed debugging
+print(f"\n🔍 Checking like count model path: {LIKE_COUNT_MODEL_PATH}")
+print(f"📁 Directory exists: {os.path.exists(LIKE_COUNT_MODEL_PATH)}")
+
+if os.path.exists(LIKE_COUNT_MODEL_PATH):
+    files_in_dir = os.listdir(LIKE_COUNT_MODEL_PATH)
+    print(f"📄 Files in directory: {files_in_dir}")
     
-    if os.path.exists(LIKE_COUNT_MODEL_PATH):
-        files_in_dir = os.listdir(LIKE_COUNT_MODEL_PATH)
-        print(f"📄 Files in directory: {files_in_dir}")
-        
-        # Try to load BERT model
-        try:
-            embedding_tokenizer = AutoTokenizer.from_pretrained(LIKE_COUNT_MODEL_PATH)
-            embedding_model = AutoModel.from_pretrained(LIKE_COUNT_MODEL_PATH)
-            print("✅ BERT model for embeddings loaded successfully")
-        except Exception as e:
-            print(f"❌ Error loading BERT model: {e}")
-            embedding_tokenizer, embedding_model = None, None
-    else:
-        print(f"❌ Like count model folder not found at {LIKE_COUNT_MODEL_PATH}")
+    # Try to load BERT model
+    try:
+        embedding_tokenizer = load_tokenizer(LIKE_COUNT_MODEL_PATH)
+        embedding_model = load_model(AutoModel, LIKE_COUNT_MODEL_PATH)
+        if LOW_MEMORY_MODE:
+            drop_unused_modules(embedding_model)
+        print("✅ BERT model for embeddings loaded successfully")
+    except SlowTokenizerError as e:
+        exit_on_slow_tokenizer(e)
+    except Exception as e:
+        print(f"❌ Error loading BERT model: {e}")
+        embedding_tokenizer, embedding_model = None, None
+else:
+    print(f"❌ Like count model folder not found at {LIKE_COUNT_MODEL_PATH}")
 
-    # Load XGBoost model
-    print(f"\n🔍 Checking XGBoost model: {XGBOOST_MODEL_PATH}")
-    print(f"📁 XGBoost file exists: {os.path.exists(XGBOOST_MODEL_PATH)}")
-    
-    if os.path.exists(XGBOOST_MODEL_PATH):
-        try:
-            like_model = joblib.load(XGBOOST_MODEL_PATH)
-            print("✅ XGBoost model loaded successfully")
-            print(f"📊 XGBoost model type: {type(like_model)}")
-            print(f"📊 Has predict method: {hasattr(like_model, 'predict')}")
-        except Exception as e:
-            print(f"❌ Error loading XGBoost model: {e}")
-            like_model = None
-    else:
-        print(f"❌ XGBoost .pkl model not found at {XGBOOST_MODEL_PATH}")
+if LOW_MEMORY_MODE:
+    try:
+        shared_weight_bytes = share_identical_weights([emotion_model, sentiment_model, embedding_model])
+    except Exception as e:
+        print(f"❌ Error sharing identical weights: {e}")
 
-except Exception as e:
-    print(f"❌ Failed to load models: {e}")
+# Load XGBoost model
+print(f"\n🔍 Checking XGBoost model: {XGBOOST_MODEL_PATH}")
+print(f"📁 XGBoost file exists: {os.path.exists(XGBOOST_MODEL_PATH)}")
+
+if os.path.exists(XGBOOST_MODEL_PATH):
+    try:
+        like_model = joblib.load(XGBOOST_MODEL_PATH)
+        print("✅ XGBoost model loaded successfully")
+        print(f"📊 XGBoost model type: {type(like_model)}")
+        print(f"📊 Has predict method: {hasattr(like_model, 'predict')}")
+    except Exception as e:
+        print(f"❌ Error loading XGBoost model: {e}")
+        like_model = None
+else:
+    print(f"❌ XGBoost .pkl model not found at {XGBOOST_MODEL_PATH}")
 
 emotion_labels = {
     0: "joy",
@@ -115,13 +494,7 @@ def extract_bert_embedding(text):
         print(f"🔍 Extracting embedding for text: '{text[:50]}...'")
         
         # Tokenize input
-        inputs = embedding_tokenizer(
-            text, 
-            return_tensors="pt", 
-            truncation=True, 
-            padding=True,
-            max_length=512
-        )
+        inputs = encode_texts([text], embedding_tokenizer, max_length=512)
         
         print(f"📊 Tokenized input shape: {inputs['input_ids'].shape}")
         
@@ -150,7 +523,7 @@ def predict_class(text, tokenizer, model):
             print("❌ Classification model components not loaded")
             return None
             
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+        inputs = encode_texts([text], tokenizer)
         with torch.no_grad():
             logits = model(**inputs).logits
         prediction = torch.argmax(logits, dim=1).item()
@@ -160,16 +533,17 @@ def predict_class(text, tokenizer, model):
         print(f"❌ Error in classification prediction: {e}")
         return None
 
-def map_regression_to_class(regression_value):
+def map_regression_to_class(regression_value, verbose=True):
     try:
         value = float(regression_value)
-        print(f"📊 Mapping regression value: {value}")
+        if verbose:
+            print(f"📊 Mapping regression value: {value}")
 
         if value < 100:
             return 0  # low
-        elif 100 <= value <= 500:
+        elif value <= 500:
             return 1  # medium
-        elif 501 <= value <= 1500:
+        elif value <= 1500:
             return 2  # high
         else:
             return 3  # viral
@@ -177,6 +551,24 @@ def map_regression_to_class(regression_value):
         print(f"❌ Error mapping regression value: {e}")
         return None
 
+def is_class_index(raw_value):
+    """Check whether an XGBoost output is already a like count class index"""
+    return isinstance(raw_value, (int, np.integer)) and 0 <= raw_value <= 3
+
+def like_count_class(raw_value, verbose=True):
+    """Turn a raw XGBoost output into a like count class index"""
+    if is_class_index(raw_value):
+        # Already a class index
+        pred_value = int(raw_value)
+        if verbose:
+            print(f"📊 Using as class index: {pred_value}")
+    else:
+        # It's a regression value, map to class
+        pred_value = map_regression_to_class(raw_value, verbose)
+        if verbose:
+            print(f"📊 Mapped to class index: {pred_value}")
+    return pred_value
+
 def predict_like_count(text):
     """Predict like count using XGBoost regressor with proper mapping"""
     try:
@@ -220,15 +612,7 @@ def predict_like_count(text):
             raw_value = prediction[0]
             print(f"📊 Raw regression value: {raw_value}")
             
-            # Check if it's already a class index or needs mapping
-            if isinstance(raw_value, (int, np.integer)) and 0 <= raw_value <= 3:
-                # Already a class index
-                pred_value = int(raw_value)
-                print(f"📊 Using as class index: {pred_value}")
-            else:
-                # It's a regression value, map to class
-                pred_value = map_regression_to_class(raw_value)
-                print(f"📊 Mapped to class index: {pred_value}")
+            pred_value = like_count_class(raw_value)
             
             if pred_value is not None:
                 return pred_value
@@ -285,6 +669,8 @@ def add_to_history(comment, emotion, sentiment, like_count):
 @app.route("/predict", methods=["POST"])
 def predict_handler():
     """Handle prediction requests with detailed debugging"""
+    global last_batch_memory
+    memory_tracker = None
     try:
         data = request.get_json()
         if not data or 'text' not in data:
@@ -297,6 +683,9 @@ def predict_handler():
         print(f"\n🔍 ===== STARTING PREDICTION =====")
         print(f"📝 Input text: '{text}'")
         
+        memory_tracker = PeakMemoryTracker().start()
+        request_start = time.perf_counter()
+        tokenization_local.seconds = 0.0
         result = {}
         
         # Predict emotion
@@ -354,11 +743,26 @@ def predict_handler():
         result["history_id"] = entry["id"]
         result["status"] = "success"
 
+        request_seconds = time.perf_counter() - request_start
+        tokenize_seconds = tokenization_local.seconds
+        tokenization_local.seconds = None
+        with tokenization_lock:
+            tokenization_stats["requests"] += 1
+            tokenization_stats["request_seconds"] += request_seconds
+            tokenization_stats["tokenize_seconds"] += tokenize_seconds
+            tokenization_stats["last_request_seconds"] = request_seconds
+            tokenization_stats["last_tokenize_seconds"] = tokenize_seconds
+
+        last_batch_memory = memory_tracker.stop()
+
         print(f"\n✅ ===== FINAL RESULT =====")
         print(f"📊 {result}")
         return jsonify(result)
 
     except Exception as e:
+        tokenization_local.seconds = None
+        if memory_tracker:
+            memory_tracker.stop()
         print(f"❌ Error in prediction handler: {e}")
         import traceback
         traceback.print_exc()
@@ -551,6 +955,45 @@ def debug_info():
         debug_info["xgboost_type"] = str(type(like_model))
         debug_info["xgboost_has_predict"] = hasattr(like_model, 'predict')
     
+    # Memory usage per model dan process
+    models = [emotion_model, sentiment_model, embedding_model]
+    debug_info["memory"] = {
+        "low_memory_mode": LOW_MEMORY_MODE,
+        "models": {
+            "emotion_model": model_memory(emotion_model),
+            "sentiment_model": model_memory(sentiment_model),
+            "embedding_model": model_memory(embedding_model)
+        },
+        "total_parameter_bytes": tensor_bytes(
+            p for m in models if m is not None for p in m.parameters()
+        ),
+        "shared_weight_bytes": shared_weight_bytes,
+        "unique_tokenizers": len({
+            id(t) for t in [emotion_tokenizer, sentiment_tokenizer, embedding_tokenizer] if t is not None
+        }),
+        "process_rss_bytes": get_rss_bytes(),
+        "process_peak_rss_bytes": get_process_peak_rss_bytes(),
+        "last_batch": last_batch_memory
+    }
+
+    # Porsi tokenisasi dari latency /predict
+    stats = dict(tokenization_stats)
+    debug_info["tokenization"] = {
+        **stats,
+        "fast_tokenizers": all(
+            t.is_fast for t in [emotion_tokenizer, sentiment_tokenizer, embedding_tokenizer] if t is not None
+        ),
+        "cache_size": len(tokenization_cache),
+        "cache_max_size": TOKENIZATION_CACHE_SIZE,
+        "share_of_request_latency": (
+            stats["tokenize_seconds"] / stats["request_seconds"] if stats["request_seconds"] else None
+        ),
+        "last_share_of_request_latency": (
+            stats["last_tokenize_seconds"] / stats["last_request_seconds"]
+            if stats["last_request_seconds"] else None
+        )
+    }
+    
     return jsonify(debug_info)
 
 if __name__ == "__main__":
@@ -575,4 +1018,5 @@ if __name__ == "__main__":
     print("🔍 Debug endpoint: http://localhost:5000/debug")
     print("🧪 Test like count: http://localhost:5000/test-like-count")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Reloader meng-import app.py di process terpisah, sehingga semua model di-load dua kali
+    app.run(debug=True, use_reloader=not LOW_MEMORY_MODE, host='0.0.0.0', port=5000)
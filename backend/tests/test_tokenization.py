@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+WORDS = ["hello", "world", "this", "video", "is", "great", "bad", "so", "funny", "lol"]
+TEXTS = [
+    "hello world",
+    "this video is so so so funny lol lol lol",
+    "great",
+    "bad video",
+]
+
+
+def make_tokenizer(padding_side):
+    """Tiny in-memory fast tokenizer, no model files needed"""
+    vocab = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3}
+    vocab.update({word: i + 4 for i, word in enumerate(WORDS)})
+    backend = Tokenizer(models.WordLevel(vocab=vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        pad_token="[PAD]",
+        unk_token="[UNK]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        model_max_length=8,
+        padding_side=padding_side
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    app.tokenization_cache.clear()
+    yield
+    app.tokenization_cache.clear()
+
+
+def assert_same_inputs(inputs, expected):
+    assert set(inputs) == set(expected)
+    for name in expected:
+        assert torch.equal(inputs[name], expected[name]), name
+
+
+@pytest.mark.parametrize("padding_side", ["right", "left"])
+def test_encode_texts_matches_direct_call(padding_side):
+    tokenizer = make_tokenizer(padding_side)
+    expected = tokenizer(TEXTS, padding=True, truncation=True, return_tensors="pt")
+
+    # Uncached
+    assert_same_inputs(app.encode_texts(TEXTS, tokenizer), expected)
+    # Fully cached
+    assert_same_inputs(app.encode_texts(TEXTS, tokenizer), expected)
+
+    # Partly cached
+    app.tokenization_cache.clear()
+    app.encode_texts(TEXTS[1:3], tokenizer)
+    assert_same_inputs(app.encode_texts(TEXTS, tokenizer), expected)
+
+
+@pytest.mark.parametrize("padding_side", ["right", "left"])
+def test_encode_texts_respects_max_length(padding_side):
+    tokenizer = make_tokenizer(padding_side)
+    expected = tokenizer(TEXTS, padding=True, truncation=True, max_length=5, return_tensors="pt")
+
+    app.encode_texts(TEXTS[:1], tokenizer, max_length=5)
+    assert_same_inputs(app.encode_texts(TEXTS, tokenizer, max_length=5), expected)
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(app, "TOKENIZATION_CACHE_SIZE", 2)
+    tokenizer = make_tokenizer("right")
+    app.encode_texts(TEXTS, tokenizer)
+    assert len(app.tokenization_cache) == 2